@@ -33,21 +33,24 @@ def check_environment():
     if os.path.exists(ENV_FILE):
         print("Environment file detected.")
         with open(ENV_FILE, "r") as f:
-            content = f.read()
-            if API_KEY_VARIABLE in content:
-                print("API key present (format not verified).")
-            else:
-                print("No API key variable found in environment file.")
-                all_good = False
+            # Only an actual assignment counts (not a comment mentioning the name); stops at the first match
+            found = any(line.lstrip().startswith(f"{API_KEY_VARIABLE}=") for line in f)
+        if found:
+            print("API key present (format not verified).")
+        else:
+            print("No API key variable found in environment file.")
+            all_good = False
     else:
         print("Environment file missing (copy .env.example).")
         all_good = False
 
     # 3. Vérification Logs
     try:
-        if not os.path.exists(LOGS_DIR):
-            os.makedirs(LOGS_DIR)
-            print("Logs directory created.")
+        # A single mkdir: an existing directory just raises FileExistsError (no stat beforehand)
+        os.makedirs(LOGS_DIR)
+        print("Logs directory created.")
+    except FileExistsError:
+        pass
     except OSError as e:
         print(f"An OS error occurred: {e}")
         all_good = False
@@ -2,32 +2,78 @@
 Refactoring Swarm Orchestrator
 Multi-agent system for automated code refactoring with self-healing capabilities.
 
-Workflow per file:
-  auditor → tester → fixer → judge
-                       ↑           |
-                       └── retry ──┘
+Workflow per file (files are processed concurrently):
+            ┌→ auditor ─┐
+  dispatch ─┤           ├→ join → fixer → judge
+     ↑      └→ tester ──┘          ↑        |
+     |                             |      retry
+     └────── retest ───── increment ←───────┘
+
+The first iteration runs as plain calls; only files that need a retry enter the graph.
+A retry normally goes straight back to the Fixer with the failure logs; when the
+Fixer left the file unchanged or the same failure repeats, the retry re-audits
+the file and regenerates its tests first (the tests may be what is broken).
+With --trust-fixer, a confident Fixer ends the run for its file; the tests
+of all such files then run in one batch at the end.
 """
 import argparse
-import time
+import asyncio
+import bisect
+import hashlib
+import logging
+import re
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import TypedDict, Literal
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Annotated, TypedDict, Literal
 
-from langgraph.graph import StateGraph, END
-from src.utils.logger import log_experiment, ActionType
-from src.auditor import Auditor
-from src.tester import Tester          # ← NEW
-from src.fixer import Fixer
-from src.judge import Judge
+from src.utils.logger import log_experiment, ActionType, buffered_logging, flush_experiment_log
+from src.utils import llm_cache
+from src.utils.llm_client import create_groq_client
+from src.utils.rate_limiter import DEFAULT_GROQ_RPM, GroqRateLimiter
 
-# Load environment variables FIRST
-load_dotenv()
+# groq, httpx, langgraph and the agents are imported where first used, so
+# --help and argument/directory errors return without paying for them
+if TYPE_CHECKING:
+    from groq import AsyncGroq
+    from langgraph.graph import StateGraph
+    from src.auditor import Auditor
 
 # Constants
 MAX_ITER = 10                  # Maximum iterations (stops early if successful)
+MAX_CONCURRENCY = 4            # Files processed in parallel (bounded for Groq rate limits)
+MAX_LLM_CALLS = 8              # Groq requests in flight across all files (429s use the SDK's retry-after backoff)
 RECURSION_LIMIT_BUFFER = 100   # Buffer for recursion limit
+GROQ_TIMEOUT = 60              # Seconds per Groq request
+PY_EXTS = (".py",)             # Source suffixes picked up by discovery (str.endswith accepts the tuple)
+SIZE_BIN_EDGES = (1024, 8192)  # Bytes: small < 1 KiB <= medium < 8 KiB <= large
+BATCH_MAX_BYTES = 24_000       # Source per batched audit request (~6k tokens of prompt)
+BATCH_MAX_FILES = 8            # Files per batched audit request (their plans share max_tokens)
+FIXER_TRUST_CONFIDENCE = 90    # With --trust-fixer, self-rated confidence that defers the Judge
+JUDGE_WORKERS = os.cpu_count() or 1   # Test subprocesses run at once (CPU-bound, unlike the LLM calls)
+MAX_TEST_LOG_CHARS = 2048      # test_logs kept in state; longer outputs keep their head and tail
+TEST_LOG_HEAD_CHARS = 512      # of which the head (the rest is the tail, where pytest's summary is)
+
+# pytest's run duration ("in 0.03s"), stripped when comparing failures across iterations
+_TIMING_RE = re.compile(r" in \d+(?:\.\d+)?s\b")
+
+# Audit plans memoized by source content, so a re-audit of an unchanged file skips Groq
+_plan_cache: dict[str, dict] = {}                   # sha256(source) → audit plan (backed by llm_cache on disk)
+_digest_memo: dict[str, tuple[int, int, str]] = {}  # path → (st_mtime_ns, st_size, sha256) of the last hash
+
+# Files whose Judge run was deferred by a confident fix (--trust-fixer): source → test file
+_deferred: dict[str, str] = {}
+
+# Per-file progress; banners and the final summary stay plain prints (configured in main)
+logger = logging.getLogger("refactor_swarm")
+
+# Shared by every agent node so parallel files and branches can't flood Groq
+_llm_limiter = asyncio.Semaphore(MAX_LLM_CALLS)
+
+# One set of agents per API key, shared by every node factory (see get_agents)
+_agents: dict[str, dict] = {}
 
 
 @dataclass
@@ -35,18 +81,53 @@ class Config:
     """Configuration for the refactoring system."""
     target_dir: str
     groq_key: str
+    client: "AsyncGroq | None" = None   # shared by every agent (one connection pool)
+    rate_limiter: GroqRateLimiter | None = None   # Groq requests-per-minute budget
+    trust_fixer: bool = False      # defer the Judge when the Fixer is confident (see FIXER_TRUST_CONFIDENCE)
+    in_process: bool = False       # Judge forks pytest runs from a preloaded forkserver instead of a new interpreter
+    no_cache: bool = False         # ignore cached plans and responses (fresh results are still stored)
+
+
+def keep_latest(current, update):
+    """Reducer for keys written by parallel branches: a None update keeps the current value."""
+    return current if update is None else update
+
+
+REDUCED_KEYS = ("plan", "test_file")   # AgentState keys merged with keep_latest
 
 
 class AgentState(TypedDict):
-    """State passed between agents in the workflow."""
+    """
+    State passed between agents in the workflow.
+    Nodes return only the keys whose value changes; LangGraph folds these partial
+    updates into its channels, so no node ever copies the whole state.
+    "error" is None and "success" False whenever an iteration starts.
+    """
     file_path: str
-    plan: dict | None
-    test_file: str | None          # ← NEW: path of the generated test file
+    plan: Annotated[dict | None, keep_latest]
+    test_file: Annotated[str | None, keep_latest]   # path of the generated test file
     iteration: int
     max_iter: int
     success: bool
     test_logs: str
     error: str | None
+    skip_judge: bool   # the Fixer was confident; tests run later in one batch
+    retest: bool       # the next retry re-audits and regenerates the tests (see route_retry)
+
+
+# Fields every file starts from; process_file only fills in the per-file keys
+INITIAL_STATE: AgentState = {
+    "file_path": "",
+    "plan": None,
+    "test_file": None,
+    "iteration": 1,
+    "max_iter": MAX_ITER,
+    "success": False,
+    "test_logs": "",
+    "error": None,
+    "skip_judge": False,
+    "retest": False,
+}
 
 
 # ---------------------------------------------------------------------------
@@ -63,142 +144,296 @@ def validate_environment() -> str:
     return groq_key
 
 
-def discover_python_files(target_dir: str) -> list[str]:
-    if not os.path.exists(target_dir):
+def discover_python_files(target_dir: str) -> dict[str, int]:
+    """Returns {path: size in bytes} for the Python files to refactor, in directory order."""
+    # scandir yields DirEntry objects whose type comes from the same readdir call (no extra stat),
+    # and a missing directory surfaces as an exception instead of a separate exists() check.
+    # Sizes are read in the same pass; DirEntry caches its stat, so nothing downstream re-stats.
+    try:
+        with os.scandir(target_dir) as entries:
+            py_files = {
+                entry.path: entry.stat(follow_symlinks=False).st_size
+                for entry in entries
+                if entry.name.endswith(PY_EXTS)
+                and not entry.name.startswith("test_")   # skip test files themselves
+                and entry.is_file(follow_symlinks=False)
+            }
+    except (FileNotFoundError, NotADirectoryError):
         print(f"❌ Error: Directory '{target_dir}' does not exist")
         sys.exit(1)
 
-    py_files = [
-        os.path.join(target_dir, f)
-        for f in os.listdir(target_dir)
-        if f.endswith(".py") and not f.startswith("test_")   # skip test files themselves
-    ]
-
     if not py_files:
         print(f"⚠️  Warning: No Python files found in '{target_dir}'")
 
     return py_files
 
 
+def truncate_logs(logs: str, limit: int = MAX_TEST_LOG_CHARS, head: int = TEST_LOG_HEAD_CHARS) -> str:
+    """
+    Shortens an oversized test log to at most *limit* characters, marker included.
+    The Judge already keeps only the last LOG_TAIL_LINES lines, so the head is the
+    start of that window (the first failure it holds), and the tail keeps pytest's
+    failure summary.
+    """
+    if len(logs) <= limit:
+        return logs
+    marker = "\n...[truncated]...\n"
+    return logs[:head] + marker + logs[-(limit - head - len(marker)):]
+
+
+@asynccontextmanager
+async def llm_slot(config: Config):
+    """Held around every Groq request: bounds calls in flight and spends one token of the RPM budget."""
+    async with _llm_limiter:
+        if config.rate_limiter is not None:
+            await config.rate_limiter.acquire()
+        yield
+
+
+def bin_files(sizes: dict[str, int], edges: tuple[int, ...] = SIZE_BIN_EDGES) -> list[list[str]]:
+    """Buckets files into small/medium/large by size, each bin sorted smallest first."""
+    bins = [[] for _ in range(len(edges) + 1)]
+    for file_path in sorted(sizes, key=sizes.__getitem__):
+        bins[bisect.bisect_right(edges, sizes[file_path])].append(file_path)
+    return bins
+
+
+def file_digest(file_path: str) -> str:
+    """
+    SHA-256 of the file's current bytes, used as the memoization key for agent results.
+    The file is only re-read and re-hashed when its mtime or size changed since the last call.
+    """
+    st = os.stat(file_path)
+    memo = _digest_memo.get(file_path)
+    if memo is not None and memo[:2] == (st.st_mtime_ns, st.st_size):
+        return memo[2]
+    with open(file_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    _digest_memo[file_path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+async def cached_plan(digest: str, file_path: str, no_cache: bool = False) -> dict | None:
+    """
+    Looks a plan up by source hash: in-process memo first, then the persistent
+    cache (read off the loop, skipped with no_cache). The plan is re-pointed at
+    *file_path*, since identical sources can live at different paths.
+    """
+    plan = _plan_cache.get(digest)
+    if plan is None:
+        if no_cache:
+            return None
+        plan = await asyncio.to_thread(llm_cache.get_plan, digest)
+        if plan is None:
+            return None
+        _plan_cache[digest] = plan
+    return {**plan, "file": file_path}
+
+
+async def store_plan(digest: str, plan: dict) -> None:
+    """Memoizes a plan in-process and on disk (written off the loop); unparsable responses are not cached."""
+    if "error" in plan:
+        return
+    _plan_cache[digest] = plan
+    await asyncio.to_thread(llm_cache.put_plan, digest, plan)
+
+
 # ---------------------------------------------------------------------------
 # Agent node factories
 # ---------------------------------------------------------------------------
 
+def get_agents(config: Config) -> dict:
+    """Returns the Auditor/Tester/Fixer/Judge for this API key, creating them on first use."""
+    agents = _agents.get(config.groq_key)
+    if agents is None:
+        from src.auditor import Auditor
+        from src.tester import Tester
+        from src.fixer import Fixer
+        from src.judge import Judge
+
+        agents = _agents[config.groq_key] = {
+            "auditor": Auditor(async_client=config.client),
+            "tester":  Tester(config.groq_key, async_client=config.client),
+            "fixer":   Fixer(config.groq_key, async_client=config.client),
+            "judge":   Judge(config.groq_key, in_process=config.in_process),
+        }
+    return agents
+
+
+async def fetch_plan(
+    auditor: "Auditor", config: Config, file_path: str, failure_logs: str | None = None
+) -> tuple[dict, bool]:
+    """
+    Returns (plan, from_cache) for the file's current content, calling Groq only on a cache miss.
+    With *failure_logs* (a re-test retry) the cached plan already failed: the file is audited
+    again with the logs in the request, and the new plan carries them on to the Fixer.
+    """
+    digest = file_digest(file_path)
+    if failure_logs is None:
+        plan = await cached_plan(digest, file_path, no_cache=config.no_cache)
+        if plan is not None:
+            return plan, True
+    else:
+        _plan_cache.pop(digest, None)
+
+    plan = await auditor.analyze_async(
+        file_path, groq_key=config.groq_key, no_cache=config.no_cache, slot=lambda: llm_slot(config),
+        failure_logs=failure_logs,
+    )
+    await store_plan(digest, plan)
+    if failure_logs is not None:
+        plan = {**plan, "prior_failure_logs": failure_logs}
+    return plan, False
+
+
 def create_auditor_node(config: Config):
-    auditor = Auditor()
+    auditor = get_agents(config)["auditor"]
 
-    def auditor_node(state: AgentState) -> AgentState:
-        print(f"\n  🔍 Auditor analyzing (iteration {state['iteration']}/{state['max_iter']})...")
-        time.sleep(2)
+    async def auditor_node(state: AgentState) -> AgentState:
+        name = os.path.basename(state["file_path"])
+        logger.info("\n  🔍 [%s] Auditor analyzing (iteration %d/%d)...", name, state["iteration"], state["max_iter"])
         try:
-            plan = auditor.analyze(state["file_path"], groq_key=config.groq_key)
+            failure_logs = state["plan"].get("prior_failure_logs") if state["retest"] and state["plan"] else None
+            plan, from_cache = await fetch_plan(auditor, config, state["file_path"], failure_logs=failure_logs)
+            if from_cache:
+                logger.info("  ♻️  [%s] Plan for the current source already cached", name)
+                return {"plan": plan}
+
             log_experiment(
                 "Auditor", "Groq", ActionType.ANALYSIS,
-                {"input_prompt": f"Analyze {state['file_path']}", "output_response": str(plan)},
+                {"input_prompt": f"Analyze {state['file_path']}", "output_response": plan},
                 "SUCCESS",
             )
-            return {**state, "plan": plan, "error": None}
+            return {"plan": plan}
         except Exception as e:
             error_msg = f"Auditor failed: {e}"
-            print(f"  ❌ {error_msg}")
+            logger.warning("  ❌ [%s] %s", name, error_msg)
             log_experiment(
                 "Auditor", "Groq", ActionType.ANALYSIS,
                 {"input_prompt": f"Analyze {state['file_path']}", "output_response": error_msg},
                 "FAILURE",
             )
-            return {**state, "plan": None, "error": error_msg, "success": False}
+            return {"error": error_msg}
 
     return auditor_node
 
 
 def create_tester_node(config: Config):
     """
-    Tester agent — generates (or regenerates) a test file for the target source.
-    On the first iteration it creates the test file.
-    On retries it regenerates it so it stays aligned with any audit-plan updates.
+    Tester agent — generates a test file for the target source.
+    Runs in parallel with the Auditor, so it only needs the source file: on the
+    first iteration there is no plan yet; on a re-test retry (see route_retry)
+    it regenerates the tests with the previous plan and its failure logs as a hint.
     """
-    tester = Tester(config.groq_key)
+    tester = get_agents(config)["tester"]
 
-    def tester_node(state: AgentState) -> AgentState:
-        if state.get("error") or not state.get("plan"):
-            print("  ⏭️  Tester skipped (previous error or no plan)")
-            return state
-
-        print(f"  🧪 Tester generating tests (iteration {state['iteration']}/{state['max_iter']})...")
-        time.sleep(1)
+    async def tester_node(state: AgentState) -> AgentState:
+        name = os.path.basename(state["file_path"])
+        logger.info("  🧪 [%s] Tester generating tests (iteration %d/%d)...", name, state["iteration"], state["max_iter"])
 
         try:
-            test_file = tester.generate_tests(state["file_path"], plan=state.get("plan"))
+            test_file = await tester.generate_tests_async(
+                state["file_path"], plan=state.get("plan"), slot=lambda: llm_slot(config)
+            )
             log_experiment(
                 "Tester", "Groq", ActionType.ANALYSIS,
                 {"input_prompt": f"Generate tests for {state['file_path']}", "output_response": test_file},
                 "SUCCESS",
             )
-            return {**state, "test_file": test_file, "error": None}
+            return {"test_file": test_file}
         except Exception as e:
             error_msg = f"Tester failed: {e}"
-            print(f"  ❌ {error_msg}")
+            logger.warning("  ❌ [%s] %s", name, error_msg)
             log_experiment(
                 "Tester", "Groq", ActionType.ANALYSIS,
                 {"input_prompt": f"Generate tests", "output_response": error_msg},
                 "FAILURE",
             )
             # Non-fatal: continue even without a test file (Judge will fall back to syntax check)
-            return {**state, "test_file": None, "error": None}
+            return {}
 
     return tester_node
 
 
 def create_fixer_node(config: Config):
-    fixer = Fixer(config.groq_key)
+    fixer = get_agents(config)["fixer"]
 
-    def fixer_node(state: AgentState) -> AgentState:
+    async def fixer_node(state: AgentState) -> AgentState:
+        name = os.path.basename(state["file_path"])
         if state.get("error") or not state.get("plan"):
-            print("  ⏭️  Fixer skipped (previous error)")
-            return state
+            logger.info("  ⏭️  [%s] Fixer skipped (previous error)", name)
+            return {}
 
-        print("  🔧 Fixer applying changes...")
-        time.sleep(2)
+        logger.info("  🔧 [%s] Fixer applying changes...", name)
 
         try:
-            fixer.apply_fix(state["plan"])
+            old_digest = file_digest(state["file_path"])
+            verdict = await fixer.apply_fix_async(
+                state["plan"], self_check=config.trust_fixer, no_cache=config.no_cache,
+                slot=lambda: llm_slot(config),
+            )
+            unchanged = file_digest(state["file_path"]) == old_digest
+            if not unchanged:
+                # The old content is gone; drop its plan
+                _plan_cache.pop(old_digest, None)
             log_experiment(
                 "Fixer", "Groq", ActionType.FIX,
-                {"input_prompt": f"Apply plan to {state['plan']['file']}", "output_response": str(state["plan"])},
+                {"input_prompt": f"Apply plan to {state['plan']['file']}", "output_response": state["plan"]},
                 "SUCCESS",
             )
-            return {**state, "error": None}
+            if (
+                config.trust_fixer and state["test_file"]
+                and verdict["expected_to_pass"] and verdict["confidence"] >= FIXER_TRUST_CONFIDENCE
+            ):
+                logger.info("  🤝 [%s] Fixer %d%% confident, tests deferred to the final batch",
+                            name, verdict["confidence"])
+                return {"skip_judge": True, "success": True}
+            # A patch that changed nothing cannot make failing tests pass: re-test next time
+            return {"retest": unchanged}
         except Exception as e:
             error_msg = f"Fixer failed: {e}"
-            print(f"  ❌ {error_msg}")
+            logger.warning("  ❌ [%s] %s", name, error_msg)
             log_experiment(
                 "Fixer", "Groq", ActionType.FIX,
                 {"input_prompt": "Apply fix", "output_response": error_msg},
                 "FAILURE",
             )
-            return {**state, "error": error_msg, "success": False}
+            return {"error": error_msg}
 
     return fixer_node
 
 
 def create_judge_node(config: Config):
-    judge = Judge(config.groq_key)
-
-    def judge_node(state: AgentState) -> AgentState:
+    """Judge agent — runs the tests."""
+    agents = get_agents(config)
+    judge = agents["judge"]
+    # No more test processes at once than there are cores; the usual pytest run is
+    # an asyncio subprocess, and the fallbacks get their own pool so they never
+    # queue behind LLM calls in the default executor
+    slots = asyncio.Semaphore(JUDGE_WORKERS)
+    pool = ThreadPoolExecutor(max_workers=JUDGE_WORKERS, thread_name_prefix="judge")
+
+    async def judge_node(state: AgentState) -> AgentState:
+        name = os.path.basename(state["file_path"])
         if state.get("error"):
-            print("  ⏭️  Judge skipped (previous error)")
-            return state
+            logger.info("  ⏭️  [%s] Judge skipped (previous error)", name)
+            return {}
 
-        print("  ⚖️  Judge running tests...")
+        logger.info("  ⚖️  [%s] Judge running tests...", name)
 
         try:
-            success, test_logs = judge.run_tests(state["file_path"])
+            async with slots:
+                success, test_logs = await judge.run_tests_async(state["file_path"], executor=pool)
+            test_logs = truncate_logs(test_logs)
 
             if success:
-                print("  ✅ Tests PASSED!")
+                logger.info("  ✅ [%s] Tests PASSED!", name)
+                # Only a patch that passed its tests is worth replaying from the cache
+                await agents["fixer"].confirm_async(state["file_path"])
             else:
-                print("  ❌ Tests FAILED")
-                print(f"     Preview: {test_logs[:200]}...")
+                logger.info("  ❌ [%s] Tests FAILED", name)
+                if sys.stdout.isatty():
+                    logger.info("     Preview: %.200s...", test_logs)
 
             log_experiment(
                 "Judge", "None", ActionType.DEBUG,
@@ -206,20 +441,19 @@ def create_judge_node(config: Config):
                 "SUCCESS" if success else "FAILURE",
             )
             return {
-                **state,
                 "success": success,
                 "test_logs": test_logs,
                 "error": None if success else "Tests failed",
             }
         except Exception as e:
             error_msg = f"Judge failed: {e}"
-            print(f"  ❌ {error_msg}")
+            logger.warning("  ❌ [%s] %s", name, error_msg)
             log_experiment(
                 "Judge", "None", ActionType.DEBUG,
                 {"input_prompt": "Run tests", "output_response": error_msg},
                 "FAILURE",
             )
-            return {**state, "success": False, "test_logs": error_msg, "error": error_msg}
+            return {"success": False, "test_logs": error_msg, "error": error_msg}
 
     return judge_node
 
@@ -229,99 +463,276 @@ def create_judge_node(config: Config):
 # ---------------------------------------------------------------------------
 
 def should_retry(state: AgentState) -> Literal["retry", "end"]:
-    if state.get("success", False):
+    # Every key is always present (files start from INITIAL_STATE), so index directly
+    if state["success"]:
         return "end"
 
+    name = os.path.basename(state["file_path"])
     if state["iteration"] >= state["max_iter"]:
-        print(f"\n  ⛔ Stopping: Max iterations ({state['max_iter']}) reached")
+        logger.info("\n  ⛔ [%s] Stopping: Max iterations (%d) reached", name, state["max_iter"])
         return "end"
 
-    error = state.get("error", "")
+    error = state["error"]
     if error and error != "Tests failed":
-        print("\n  ⛔ Stopping: Fatal error detected")
+        logger.warning("\n  ⛔ [%s] Stopping: Fatal error detected", name)
         return "end"
 
-    print("\n  🔄 Retrying...")
+    logger.info("\n  🔄 [%s] Retrying...", name)
     return "retry"
 
 
+def route_after_fix(state: AgentState) -> Literal["judge", "end"]:
+    """A confident fix skips the Judge; its tests run in the batched check after all files."""
+    return "end" if state["skip_judge"] else "judge"
+
+
+def failure_signature(test_logs: str) -> frozenset[str] | str:
+    """What failed, without run-to-run noise: pytest's FAILED/ERROR lines, else the logs minus timings."""
+    failures = frozenset(
+        line for line in test_logs.splitlines() if line.startswith(("FAILED ", "ERROR "))
+    )
+    return failures or _TIMING_RE.sub("", test_logs).strip()
+
+
 def increment_iteration(state: AgentState) -> AgentState:
-    return {**state, "iteration": state["iteration"] + 1, "error": None}
+    update = {"iteration": state["iteration"] + 1, "error": None}
+    if state["plan"] and state["test_logs"]:
+        prior = state["plan"].get("prior_failure_logs")
+        repeated = prior is not None and failure_signature(prior) == failure_signature(state["test_logs"])
+        update["retest"] = state["retest"] or repeated
+        # The Fixer sees why its last attempt failed
+        update["plan"] = {**state["plan"], "prior_failure_logs": state["test_logs"]}
+    return update
+
+
+def route_retry(state: AgentState) -> Literal["fixer", "auditor"]:
+    """
+    Tests failing against an existing plan usually means only the patch was
+    wrong: the Fixer retries with the failure logs, skipping the Auditor and
+    Tester. When the Fixer left the file unchanged or the same failure came
+    back, patching again is unlikely to help, so the file is re-audited and
+    its tests regenerated first.
+    """
+    if state["plan"] and state["test_logs"] and not state["retest"]:
+        return "fixer"
+    if state["plan"] and state["test_logs"]:
+        logger.info("  🔁 [%s] No progress, re-auditing and regenerating tests",
+                    os.path.basename(state["file_path"]))
+    return "auditor"
+
+
+def dispatch(state: AgentState) -> AgentState:
+    """Fan-out point: its two outgoing edges start the Auditor and Tester in the same step."""
+    return {}
+
+
+def join(state: AgentState) -> AgentState:
+    """Fan-in point: runs once both parallel branches have written their results."""
+    return {}
+
+
+def apply_update(state: AgentState, update: AgentState) -> AgentState:
+    """Folds a node's partial update into *state* in place, the same way the graph's channels do."""
+    for key, value in update.items():
+        state[key] = keep_latest(state.get(key), value) if key in REDUCED_KEYS else value
+    return state
 
 
 # ---------------------------------------------------------------------------
 # Workflow construction
 # ---------------------------------------------------------------------------
 
-def build_workflow(config: Config) -> StateGraph:
+def build_nodes(config: Config) -> dict:
+    """Creates the agent nodes once, shared by the compiled graph and the first-pass fast path."""
+    return {
+        "auditor": create_auditor_node(config),
+        "tester":  create_tester_node(config),
+        "fixer":   create_fixer_node(config),
+        "judge":   create_judge_node(config),
+    }
+
+
+def build_workflow(nodes: dict, max_iter: int) -> "StateGraph":
+    from langgraph.graph import StateGraph, END
+
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("auditor", create_auditor_node(config))
-    workflow.add_node("tester",  create_tester_node(config))   # ← NEW
-    workflow.add_node("fixer",   create_fixer_node(config))
-    workflow.add_node("judge",   create_judge_node(config))
+    workflow.add_node("dispatch", dispatch)
+    workflow.add_node("auditor", nodes["auditor"])
+    workflow.add_node("tester",  nodes["tester"])
+    workflow.add_node("join",    join)
+    workflow.add_node("fixer",   nodes["fixer"])
+    workflow.add_node("judge",   nodes["judge"])
     workflow.add_node("increment", increment_iteration)
 
-    workflow.set_entry_point("auditor")
-    workflow.add_edge("auditor", "tester")    # ← auditor → tester
-    workflow.add_edge("tester",  "fixer")     # ← tester  → fixer
-    workflow.add_edge("fixer",   "judge")
+    # The graph only runs retries: it starts from the first pass's final state
+    workflow.set_entry_point("increment")
+    workflow.add_conditional_edges(
+        "increment",
+        route_retry,
+        {"fixer": "fixer", "auditor": "dispatch"},
+    )
+
+    # Auditor and Tester are independent LLM calls: fan out, then join before the Fixer
+    workflow.add_edge("dispatch", "auditor")
+    workflow.add_edge("dispatch", "tester")
+    workflow.add_edge("auditor", "join")
+    workflow.add_edge("tester",  "join")
+    workflow.add_edge("join",    "fixer")
+    workflow.add_conditional_edges(
+        "fixer",
+        route_after_fix,
+        {"judge": "judge", "end": END},
+    )
 
     workflow.add_conditional_edges(
         "judge",
         should_retry,
         {"retry": "increment", "end": END},
     )
-    # On retry: re-run auditor (which re-plans) then tester (which regenerates tests)
-    workflow.add_edge("increment", "auditor")
-
-    return workflow.compile()
+    # Bound once here rather than passed per invoke.
+    # Longest iteration: increment → dispatch → auditor‖tester → join → fixer → judge = 6 steps
+    return workflow.compile().with_config(
+        {"recursion_limit": (max_iter * 6) + RECURSION_LIMIT_BUFFER}
+    )
 
 
 # ---------------------------------------------------------------------------
 # File processing & CLI
 # ---------------------------------------------------------------------------
 
-def process_file(workflow: StateGraph, file_path: str, max_iter: int) -> bool:
-    print(f"\n{'='*60}")
-    print(f"📄 Processing: {file_path}")
-    print(f"{'='*60}")
+def split_batches(file_paths: list[str], sizes: dict[str, int]) -> list[list[str]]:
+    """Groups files into audit batches that stay within BATCH_MAX_BYTES and BATCH_MAX_FILES."""
+    batches, current, size = [], [], 0
+    for file_path in file_paths:
+        file_size = sizes[file_path]
+        if current and (size + file_size > BATCH_MAX_BYTES or len(current) == BATCH_MAX_FILES):
+            batches.append(current)
+            current, size = [], 0
+        current.append(file_path)
+        size += file_size
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def audit_batch(config: Config, batch: list[str]) -> dict[str, dict]:
+    """One batched Groq audit; a failure only costs these files their prefetched plans."""
+    try:
+        plans = await get_agents(config)["auditor"].analyze_batch_async(
+            batch, groq_key=config.groq_key, no_cache=config.no_cache, slot=lambda: llm_slot(config)
+        )
+        for file_path, plan in plans.items():
+            await store_plan(file_digest(file_path), plan)
+        log_experiment(
+            "Auditor", "Groq", ActionType.ANALYSIS,
+            {"input_prompt": f"Batch analyze {len(batch)} files", "output_response": plans},
+            "SUCCESS",
+        )
+        return plans
+    except Exception as e:
+        error_msg = f"Batch audit failed, falling back to per-file audits: {e}"
+        logger.warning("  ⚠️  %s", error_msg)
+        log_experiment(
+            "Auditor", "Groq", ActionType.ANALYSIS,
+            {"input_prompt": f"Batch analyze {len(batch)} files", "output_response": error_msg},
+            "FAILURE",
+        )
+        return {}
 
-    initial_state: AgentState = {
-        "file_path": file_path,
-        "plan": None,
-        "test_file": None,
-        "iteration": 1,
-        "max_iter": max_iter,
-        "success": False,
-        "test_logs": "",
-        "error": None,
-    }
+
+async def prefetch_plans(config: Config, py_files: dict[str, int]) -> dict[str, dict]:
+    """
+    Collects a plan for every file before dispatch: plans cached from earlier
+    runs are reused as-is, and the remaining files are audited in a few batched
+    Groq requests (split by size, sent concurrently) whose results seed the
+    plan cache, so the first iteration's Auditor nodes hit the cache instead
+    of making N requests.
+    Files the batches missed (or a lone pending file) are then audited with
+    one concurrent request each, so iteration 1 starts with every plan known.
+    """
+    plans = {}
+    pending = []
+    for file_path in py_files:
+        plan = await cached_plan(file_digest(file_path), file_path, no_cache=config.no_cache)
+        if plan is None:
+            pending.append(file_path)
+        else:
+            plans[file_path] = plan
+
+    if plans:
+        logger.info("\n  ♻️  Reusing cached plans for %d/%d files", len(plans), len(py_files))
+
+    if len(pending) >= 2:
+        batches = split_batches(pending, py_files)
+        logger.info("\n  🔍 Auditor batch-analyzing %d files in %d request(s)...", len(pending), len(batches))
+        found = 0
+        for batch_plans in await asyncio.gather(*(audit_batch(config, batch) for batch in batches)):
+            plans.update(batch_plans)
+            found += len(batch_plans)
+        logger.info("  ✅ Batch audit returned plans for %d/%d files", found, len(pending))
+
+    missing = [file_path for file_path in pending if file_path not in plans]
+    if missing:
+        audited = await get_agents(config)["auditor"].analyze_many(
+            missing, groq_key=config.groq_key, no_cache=config.no_cache, slot=lambda: llm_slot(config)
+        )
+        for file_path, plan in audited.items():
+            await store_plan(file_digest(file_path), plan)
+            log_experiment(
+                "Auditor", "Groq", ActionType.ANALYSIS,
+                {"input_prompt": f"Analyze {file_path}", "output_response": plan},
+                "SUCCESS",
+            )
+        plans.update(audited)
+    return plans
+
+
+async def run_first_iteration(nodes: dict, state: AgentState) -> AgentState:
+    """
+    Runs iteration 1 as plain calls, mirroring the graph without its per-step
+    bookkeeping. Most files pass first try, so they never touch the graph.
+    """
+    audit_update, test_update = await asyncio.gather(
+        nodes["auditor"](state), nodes["tester"](state)
+    )
+    state = apply_update(apply_update(state, audit_update), test_update)
+    state = apply_update(state, await nodes["fixer"](state))
+    if route_after_fix(state) == "end":
+        return state
+    return apply_update(state, await nodes["judge"](state))
+
+
+async def process_file(
+    workflow: "StateGraph", nodes: dict, file_path: str, max_iter: int, plan: dict | None = None
+) -> bool:
+    logger.info("\n%s\n📄 Processing: %s\n%s", "=" * 60, file_path, "=" * 60)
+
+    initial_state: AgentState = {**INITIAL_STATE, "file_path": file_path, "max_iter": max_iter, "plan": plan}
 
     try:
-        # Each iteration: auditor → tester → fixer → judge → increment = 5 nodes
-        recursion_limit = (max_iter * 5) + RECURSION_LIMIT_BUFFER
-        print(f"  ℹ️  Recursion limit set to: {recursion_limit}")
+        final_state = await run_first_iteration(nodes, initial_state)
 
-        final_state = workflow.invoke(
-            initial_state,
-            config={"recursion_limit": recursion_limit},
-        )
+        # Only files that need retries are promoted to the graph, seeded with the first pass
+        if should_retry(final_state) == "retry":
+            final_state = await workflow.ainvoke(final_state)
 
+        if final_state["skip_judge"]:
+            _deferred[file_path] = final_state["test_file"]
+            logger.info("\n☑️  FIXED: %s (tests deferred to the final batch)", file_path)
+            return True
         if final_state["success"]:
-            print(f"\n✅ SUCCESS: {file_path} passed all tests!")
+            logger.info("\n✅ SUCCESS: %s passed all tests!", file_path)
             return True
         else:
-            print(f"\n⚠️  INCOMPLETE: {file_path} did not pass after {max_iter} iterations")
-            if final_state.get("test_logs"):
-                print("\n📋 Final test output:")
-                print(final_state["test_logs"][:500])
-                if len(final_state["test_logs"]) > 500:
-                    print("... (truncated)")
+            logger.warning("\n⚠️  INCOMPLETE: %s did not pass after %d iterations", file_path, max_iter)
+            if final_state["test_logs"]:
+                # Already bounded by the judge node
+                logger.warning("\n📋 Final test output:\n%s", final_state["test_logs"])
             return False
 
     except Exception as e:
-        print(f"\n❌ ERROR: Failed to process {file_path}\n   Error: {e}")
+        logger.error("\n❌ ERROR: Failed to process %s\n   Error: %s", file_path, e)
         log_experiment(
             "System", "None", ActionType.DEBUG,
             {"input_prompt": f"Process {file_path}", "output_response": str(e)},
@@ -329,6 +740,90 @@ def process_file(workflow: StateGraph, file_path: str, max_iter: int) -> bool:
         )
         return False
 
+    finally:
+        # Nodes only queue their log entries; persist (and serialize) them once per file, off the loop
+        await asyncio.to_thread(flush_experiment_log)
+
+
+async def process_all(
+    config: Config, workflow: "StateGraph", nodes: dict,
+    py_files: dict[str, int], max_iter: int, concurrency: int,
+) -> list[tuple[str, bool]]:
+    """
+    Runs every file's workflow concurrently. The per-file pipelines are
+    independent, so wall-clock is bounded by the slowest file rather than the
+    sum of all files; the semaphore caps in-flight files to respect Groq rate limits.
+
+    Files run in size bins, small → medium → large, so one long file never
+    holds up many short ones. Small files hold a slot briefly and get twice
+    the concurrency; large ones get half.
+    """
+    plans = await prefetch_plans(config, py_files)
+    concurrency = max(1, concurrency)
+    bin_concurrency = (concurrency * 2, concurrency, max(1, concurrency // 2))
+    started = 0
+    results = []
+
+    async def bounded(semaphore: asyncio.Semaphore, file_path: str) -> bool:
+        nonlocal started
+        async with semaphore:
+            started += 1
+            logger.info("\n[File %d/%d]", started, len(py_files))
+            return await process_file(workflow, nodes, file_path, max_iter, plans.get(file_path))
+
+    for size_bin, limit in zip(bin_files(py_files), bin_concurrency):
+        if not size_bin:
+            continue
+        semaphore = asyncio.Semaphore(limit)
+        outcomes = await asyncio.gather(
+            *(bounded(semaphore, file_path) for file_path in size_bin),
+            return_exceptions=True,
+        )
+        # process_file already reports its own failures; anything escaping it counts as a failed file
+        results.extend((file_path, ok is True) for file_path, ok in zip(size_bin, outcomes))
+
+    if _deferred:
+        results = await verify_deferred(config, results)
+    return results
+
+
+async def run_swarm(
+    config: Config, workflow: "StateGraph", nodes: dict,
+    py_files: dict[str, int], max_iter: int, concurrency: int,
+) -> list[tuple[str, bool]]:
+    """Runs process_all, then closes the shared async client on the same event loop."""
+    try:
+        return await process_all(config, workflow, nodes, py_files, max_iter, concurrency)
+    finally:
+        await config.client.close()
+
+
+async def verify_deferred(config: Config, results: list[tuple[str, bool]]) -> list[tuple[str, bool]]:
+    """
+    Runs the tests skipped by confident fixes in one pytest process (one
+    startup for the whole batch) and fails the files whose tests do not pass.
+    """
+    logger.info("\n⚖️  Running deferred tests for %d file(s) in one batch...", len(_deferred))
+    passed, test_logs = await asyncio.to_thread(
+        get_agents(config)["judge"].run_tests_batch, list(_deferred.values())
+    )
+    log_experiment(
+        "Judge", "None", ActionType.DEBUG,
+        {"input_prompt": f"Run deferred tests for {len(_deferred)} files", "output_response": truncate_logs(test_logs)},
+        "SUCCESS" if all(passed.values()) else "FAILURE",
+    )
+    fixer = get_agents(config)["fixer"]
+    settled = []
+    for file_path, ok in results:
+        if file_path in _deferred:
+            if passed[_deferred[file_path]]:
+                await fixer.confirm_async(file_path)
+            else:
+                logger.warning("  ❌ [%s] Deferred tests FAILED", os.path.basename(file_path))
+                ok = False
+        settled.append((file_path, ok))
+    return settled
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -338,10 +833,61 @@ def main():
                         help="Directory containing Python files to refactor")
     parser.add_argument("--max_iter", type=int, default=MAX_ITER,
                         help=f"Maximum iterations per file (default: {MAX_ITER})")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY,
+                        help=f"Files processed in parallel; doubled for small files, halved for large "
+                             f"(default: {MAX_CONCURRENCY})")
+    parser.add_argument("--trust-fixer", action="store_true",
+                        help=f"Skip the Judge when the Fixer rates its patch >= {FIXER_TRUST_CONFIDENCE}%% likely "
+                             "to pass; those files are tested together at the end")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run tests in children forked from a server with pytest preloaded instead of "
+                             "a new pytest process each, skipping interpreter startup (POSIX only)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore cached plans and LLM responses from earlier runs (fresh results are still cached)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Only report failures while files are processed (banners and summary still print)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="List the files that would be processed and exit (no API key needed)")
     args = parser.parse_args()
 
+    # .env is loaded before anything reads the environment (LOG_LEVEL, GROQ_API_KEY, GROQ_RPM)
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    if not isinstance(logging.getLevelName(level), int):
+        parser.error(f"invalid LOG_LEVEL {level!r} (choose from DEBUG, INFO, WARNING, ERROR, CRITICAL)")
+    rpm = os.getenv("GROQ_RPM", str(DEFAULT_GROQ_RPM))
+    if not rpm.strip().isdigit() or int(rpm) <= 0:
+        parser.error(f"invalid GROQ_RPM {rpm!r} (must be a positive integer)")
+    logging.basicConfig(
+        level=logging.WARNING if args.quiet else level,
+        format="%(message)s",
+        stream=sys.stdout,
+    )
+
+    # Discovery needs neither the API key nor the graph, so nothing is built for an empty run
+    py_files = discover_python_files(args.target_dir)
+    if not py_files:
+        print("\n⚠️  No files to process. Exiting.")
+        sys.exit(0)
+
+    if args.dry_run:
+        print(f"\n📂 {len(py_files)} Python file(s) would be processed:")
+        for file_path in py_files:
+            print(f"   • {file_path}")
+        sys.exit(0)
+
     groq_key = validate_environment()
-    config = Config(target_dir=args.target_dir, groq_key=groq_key)
+    config = Config(
+        target_dir=args.target_dir,
+        groq_key=groq_key,
+        client=create_groq_client(groq_key, timeout=GROQ_TIMEOUT),
+        rate_limiter=GroqRateLimiter(int(rpm)),
+        trust_fixer=args.trust_fixer,
+        in_process=args.in_process,
+        no_cache=args.no_cache,
+    )
 
     log_experiment(
         "System", "None", ActionType.DEBUG,
@@ -354,35 +900,32 @@ def main():
     print(f"{'='*60}")
     print(f"   Target directory : {config.target_dir}")
     print(f"   Max iterations   : {args.max_iter}")
+    print(f"   Concurrency      : {args.concurrency}")
     print(f"   AI Provider      : Groq API (Ultra-fast)")
-    print(f"   Pipeline         : Auditor → Tester → Fixer → Judge")
+    print(f"   Pipeline         : (Auditor ‖ Tester) → Fixer → Judge")
     print(f"{'='*60}")
-
-    py_files = discover_python_files(config.target_dir)
     print(f"\n   📂 Found {len(py_files)} Python file(s)")
 
-    if not py_files:
-        print("\n⚠️  No files to process. Exiting.")
-        sys.exit(0)
+    nodes = build_nodes(config)
+    workflow = build_workflow(nodes, args.max_iter)
 
-    workflow = build_workflow(config)
-
-    results = []
-    for i, file_path in enumerate(py_files, 1):
-        print(f"\n[File {i}/{len(py_files)}]")
-        success = process_file(workflow, file_path, args.max_iter)
-        results.append((file_path, success))
+    with buffered_logging():
+        results = asyncio.run(
+            run_swarm(config, workflow, nodes, py_files, args.max_iter, args.concurrency)
+        )
 
     # Summary
     print(f"\n{'='*60}")
     print("📊 FINAL SUMMARY")
     print(f"{'='*60}")
 
-    successful = sum(1 for _, ok in results if ok)
-    total = len(results)
-
+    successful = 0
+    lines = []
     for file_path, ok in results:
-        print(f"  {'✅' if ok else '❌'} {os.path.basename(file_path)}")
+        successful += ok
+        lines.append(f"  {'✅' if ok else '❌'} {os.path.basename(file_path)}")
+    print("\n".join(lines))
+    total = len(results)
 
     print(f"\n{'='*60}")
     rate = 100 * successful // total if total else 0
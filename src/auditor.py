@@ -1,60 +1,151 @@
 import json
-import os
-from groq import Groq
+import logging
 
-class Auditor:
-    def analyze(self, file_path, groq_key=None):
+from src.llm_agent import LLMAgent
+from src.utils.llm_utils import gather_calls, load_prompt, loads_json, strip_fences
+
+logger = logging.getLogger(__name__)
+
+# System messages are built once and shared (read-only) by every request
+AUDITOR_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful code analysis assistant that provides structured JSON responses. Always return valid JSON only, without any markdown formatting or additional text."
+}
+AUDITOR_BATCH_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful code analysis assistant that provides structured JSON responses. Always return a valid JSON array only, without any markdown formatting or additional text."
+}
+
+class Auditor(LLMAgent):
+    def __init__(self, client=None, async_client=None):
+        # The API key is passed per call (see analyze)
+        super().__init__(client=client, async_client=async_client)
+
+    def analyze(self, file_path, groq_key=None, no_cache=False, failure_logs=None):
         """
         Analyzes the Python file for issues using Groq AI.
+        *failure_logs* are the test failures a fix based on the previous plan left behind.
+        An identical earlier request is answered from the response cache unless no_cache is set;
+        only responses that parse into a plan are cached.
+        """
+        # Get response from Groq
+        response_text, key = self.call(
+            self._analyze_request(file_path, failure_logs), no_cache=no_cache, groq_key=groq_key
+        )
+        plan = self._parse_plan(response_text, file_path)
+        if "error" not in plan:
+            self.remember(key, response_text)
+        return plan
+
+    async def analyze_async(self, file_path, groq_key=None, no_cache=False, slot=None, failure_logs=None):
         """
+        Async variant of analyze (see LLMAgent.call_async for *slot*).
+        """
+        response_text, key = await self.call_async(
+            self._analyze_request(file_path, failure_logs), no_cache=no_cache, groq_key=groq_key, slot=slot
+        )
+        plan = self._parse_plan(response_text, file_path)
+        if "error" not in plan:
+            await self.remember_async(key, response_text)
+        return plan
+
+    def _analyze_request(self, file_path, failure_logs=None):
+        """Builds the chat-completion arguments for a single-file audit."""
         # Read the file content
-        with open(file_path, 'r', encoding='utf-8') as f:
-            code_content = f.read()
-        
-        # Read the auditor prompt
-        prompt_path = os.path.join(os.path.dirname(__file__), '..', 'prompts', 'auditor_prompt_v1.txt')
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            prompt_template = f.read()
-        
+        code_content = self._read_source(file_path)
+
+        # Auditor prompt (read from disk once, then cached)
+        prompt_template = load_prompt('auditor_prompt_v1.txt')
+
         # Combine prompt with code
         full_prompt = f"{prompt_template}\n\nPython code to analyze:\n{code_content}"
-        
-        # Initialize Groq client
-        client = Groq(api_key=groq_key)
-        
-        # Get response from Groq
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful code analysis assistant that provides structured JSON responses. Always return valid JSON only, without any markdown formatting or additional text."
-                },
-                {
-                    "role": "user",
-                    "content": full_prompt
-                }
-            ],
-            model="llama-3.3-70b-versatile",  # Fast and capable model
-            temperature=0.2,
-            max_tokens=2048
-        )
-        
-        response_text = chat_completion.choices[0].message.content.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith("```json"):
-            response_text = response_text.split("```json", 1)[1]
-            response_text = response_text.rsplit("```", 1)[0].strip()
-        elif response_text.startswith("```"):
-            response_text = response_text.split("```", 1)[1]
-            response_text = response_text.rsplit("```", 1)[0].strip()
-        
+        if failure_logs:
+            full_prompt += (
+                "\n\nA fix based on an earlier analysis of this code still fails these tests; "
+                f"make sure the issues you report explain them:\n{failure_logs}"
+            )
+
+        return self._request(AUDITOR_SYSTEM_MESSAGE, full_prompt, temperature=0.2, max_tokens=2048)
+
+    def _parse_plan(self, response_text, file_path):
+        """Turns the model's answer into a plan for *file_path*."""
+        response_text = strip_fences(response_text)
+
         # Parse JSON response
         try:
-            plan = json.loads(response_text)
+            plan = loads_json(response_text)
             plan["file"] = file_path  # Add file path to plan
             return plan
         except json.JSONDecodeError as e:
-            print(f"Error parsing JSON response: {e}")
-            print(f"Raw response: {response_text[:200]}...")
+            logger.warning("Error parsing JSON response: %s\nRaw response: %.200s...", e, response_text)
             return {"file": file_path, "issues": [], "error": "Failed to parse response"}
+
+    async def analyze_many(self, file_paths, groq_key=None, no_cache=False, slot=None):
+        """
+        Audits several files with one concurrent request each (see analyze_batch_async
+        for a single shared request). Returns {file_path: plan}; files whose
+        request failed are left out, like analyze_batch_async does.
+        """
+        plans = await gather_calls(
+            [
+                lambda p=file_path: self.analyze_async(p, groq_key=groq_key, no_cache=no_cache, slot=slot)
+                for file_path in file_paths
+            ]
+        )
+        return {
+            file_path: plan
+            for file_path, plan in zip(file_paths, plans)
+            if not isinstance(plan, BaseException)
+        }
+
+    async def analyze_batch_async(self, file_paths, groq_key=None, no_cache=False, slot=None):
+        """
+        Analyzes several Python files with a single Groq request, so the
+        per-request overhead is paid once instead of once per file.
+        Returns {file_path: plan}; files the model left out are simply missing
+        (they get audited individually later). A response is only cached when
+        it yielded at least one plan (see LLMAgent.call_async for *slot*).
+        """
+        response_text, key = await self.call_async(
+            self._batch_request(file_paths), no_cache=no_cache, groq_key=groq_key, slot=slot
+        )
+        plans = self._parse_batch(response_text, file_paths)
+        if plans:
+            await self.remember_async(key, response_text)
+        return plans
+
+    def _batch_request(self, file_paths):
+        """Builds the chat-completion arguments for a multi-file audit."""
+        sources = []
+        for i, file_path in enumerate(file_paths, 1):
+            sources.append(f"=== FILE {i}: {file_path} ===\n{self._read_source(file_path)}")
+
+        prompt_template = load_prompt('auditor_prompt_v1.txt')
+
+        full_prompt = (
+            f"{prompt_template}\n\n"
+            "You will receive several files below. Analyze each one independently and return a JSON array "
+            "with one object per file: {\"file\": <path exactly as given>, \"issues\": [...]}.\n\n"
+            + "\n\n".join(sources)
+        )
+
+        return self._request(AUDITOR_BATCH_SYSTEM_MESSAGE, full_prompt, temperature=0.2, max_tokens=8192)
+
+    def _parse_batch(self, response_text, file_paths):
+        """Maps the model's JSON array back to {file_path: plan}."""
+        response_text = strip_fences(response_text)
+
+        try:
+            results = loads_json(response_text)
+        except json.JSONDecodeError as e:
+            logger.warning("Error parsing batch JSON response: %s\nRaw response: %.200s...", e, response_text)
+            return {}
+
+        if isinstance(results, dict):
+            results = results.get("plans", [])
+
+        plans = {}
+        for plan in results:
+            if isinstance(plan, dict) and plan.get("file") in file_paths:
+                plans[plan["file"]] = plan
+        return plans
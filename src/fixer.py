@@ -1,63 +1,146 @@
 import json
+import logging
 import os
-from groq import Groq
 
-class Fixer:
-    def __init__(self, groq_key):
-        self.groq_key = groq_key
-    
-    def apply_fix(self, plan):
+from src.llm_agent import LLMAgent
+from src.utils.llm_utils import dumps_json, load_prompt, loads_json, strip_fences
+
+logger = logging.getLogger(__name__)
+
+# Appended to the prompt when the Fixer is asked to rate its own patch
+SELF_CHECK_INSTRUCTIONS = (
+    "Respond with a single JSON object instead of plain code: "
+    "{\"patch\": <the complete corrected Python file>, "
+    "\"confidence\": <0-100, how sure you are the corrected file passes its unit tests>, "
+    "\"expected_to_pass\": <true or false>}"
+)
+
+# System messages are built once and shared (read-only) by every request
+FIXER_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful code refactoring assistant. Return only the fixed Python code without any explanations, markdown formatting, or additional text. Just pure Python code."
+}
+FIXER_SELF_CHECK_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful code refactoring assistant. Return only a valid JSON object, without any markdown formatting or additional text."
+}
+
+class Fixer(LLMAgent):
+    def __init__(self, groq_key, client=None, async_client=None):
+        super().__init__(groq_key, client=client, async_client=async_client)
+        # file → (cache key, response) of the last patch written to it, cached only
+        # once its tests pass (see confirm_async), so a failing patch is never replayed
+        self._unconfirmed = {}
+
+    def apply_fix(self, plan, self_check=False, no_cache=False):
         """
         Applies fixes to the Python file based on the refactoring plan using Groq AI.
+
+        With self_check, the same request also asks the model to rate its patch, and
+        {"confidence": int, "expected_to_pass": bool} is returned instead of the plan.
+        An identical earlier request is answered from the response cache unless no_cache is set;
+        a patch is only cached once confirm_async() reports that its tests passed.
         """
-        file_path = plan["file"]
-        
+        # Get response from Groq, streamed so a long patch arrives as it is generated
+        response_text, key = self.call(self._fix_request(plan, self_check), no_cache=no_cache)
+        return self._write_fix(response_text, plan, self_check, key)
+
+    async def apply_fix_async(self, plan, self_check=False, no_cache=False, slot=None):
+        """
+        Async variant of apply_fix (see LLMAgent.call_async for *slot*).
+        """
+        response_text, key = await self.call_async(self._fix_request(plan, self_check), no_cache=no_cache, slot=slot)
+        return self._write_fix(response_text, plan, self_check, key)
+
+    async def confirm_async(self, file_path):
+        """Caches the last patch written to file_path (off the loop); called once its tests passed."""
+        key, response_text = self._unconfirmed.pop(file_path, (None, None))
+        await self.remember_async(key, response_text)
+
+    def _fix_request(self, plan, self_check):
+        """Builds the chat-completion arguments for fixing plan["file"]."""
         # Read the original code
-        with open(file_path, 'r', encoding='utf-8') as f:
-            original_code = f.read()
-        
-        # Read the fixer prompt
-        prompt_path = os.path.join(os.path.dirname(__file__), '..', 'prompts', 'fixer_prompt_v1.txt')
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            prompt_template = f.read()
-        
+        original_code = self._read_source(plan["file"])
+
+        # Fixer prompt (read from disk once, then cached)
+        prompt_template = load_prompt('fixer_prompt_v1.txt')
+
         # Prepare the input: prompt + original code + plan
-        plan_json = json.dumps(plan, indent=2)
+        plan_json = dumps_json(plan)
         full_prompt = f"{prompt_template}\n\nOriginal Python file:\n{original_code}\n\nRefactoring plan:\n{plan_json}"
-        
-        # Initialize Groq client
-        client = Groq(api_key=self.groq_key)
-        
-        # Get response from Groq
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful code refactoring assistant. Return only the fixed Python code without any explanations, markdown formatting, or additional text. Just pure Python code."
-                },
-                {
-                    "role": "user",
-                    "content": full_prompt
-                }
-            ],
-            model="llama-3.3-70b-versatile",  # Fast and capable model
+        if self_check:
+            full_prompt += f"\n\n{SELF_CHECK_INSTRUCTIONS}"
+
+        return self._request(
+            FIXER_SELF_CHECK_SYSTEM_MESSAGE if self_check else FIXER_SYSTEM_MESSAGE,
+            full_prompt,
             temperature=0.1,
-            max_tokens=4096
+            max_tokens=4096,
+            stream=True,
         )
-        
-        fixed_code = chat_completion.choices[0].message.content.strip()
-        
-        # Remove markdown code blocks if present
-        if fixed_code.startswith("```python"):
-            fixed_code = fixed_code.split("```python", 1)[1]
-            fixed_code = fixed_code.rsplit("```", 1)[0].strip()
-        elif fixed_code.startswith("```"):
-            fixed_code = fixed_code.split("```", 1)[1]
-            fixed_code = fixed_code.rsplit("```", 1)[0].strip()
-        
+
+    def _write_fix(self, response_text, plan, self_check, key=None):
+        """Writes the model's corrected code back to plan["file"]."""
+        file_path = plan["file"]
+        fixed_code = strip_fences(response_text)
+        verdict = {"confidence": 0, "expected_to_pass": False}
+
+        if self_check:
+            fixed_code, verdict = self._split_self_check(fixed_code, verdict)
+            if fixed_code is None:
+                logger.warning("Fixer returned malformed JSON for %s, file left unchanged", file_path)
+                return verdict
+
+            # The patch itself may be fenced inside the JSON
+            fixed_code = strip_fences(fixed_code)
+
         # Write the fixed code back to the file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(fixed_code)
-        
-        print(f"Fixer applied fixes to {file_path}")
-        return plan
+        self._write_atomic(file_path, fixed_code)
+        if key is None:
+            self._unconfirmed.pop(file_path, None)
+        else:
+            self._unconfirmed[file_path] = (key, response_text)
+
+        logger.info("Fixer applied fixes to %s", file_path)
+        return verdict if self_check else plan
+
+    def _write_atomic(self, file_path, code):
+        """
+        Replaces file_path with code in one write plus a rename, so a crash
+        mid-write never leaves a truncated source file behind.
+        """
+        data = code.encode('utf-8')
+        tmp_path = f"{file_path}.tmp"
+        try:
+            mode = os.stat(file_path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        try:
+            with os.fdopen(fd, 'wb', buffering=0) as f:
+                view = memoryview(data)
+                while view:
+                    view = view[f.write(view):]
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            # Leave the original untouched and no stray temp file behind
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _split_self_check(self, response_text, verdict):
+        """
+        Separates a self-check response into (code, verdict). A plain-code answer is
+        kept with zero confidence; unparsable JSON yields (None, verdict).
+        """
+        text = response_text
+        if not text.startswith("{"):
+            return response_text, verdict
+        try:
+            data = loads_json(text)
+            return str(data["patch"]), {
+                "confidence": int(data.get("confidence", 0)),
+                "expected_to_pass": bool(data.get("expected_to_pass", False)),
+            }
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return None, verdict
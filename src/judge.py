@@ -1,9 +1,58 @@
+import ast
+import asyncio
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import multiprocessing
 import os
 import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from collections import deque
+from xml.etree import ElementTree
+
+TEST_TIMEOUT = 30       # Seconds allowed per test run
+LOG_TAIL_LINES = 200    # Lines of test output kept; earlier lines are dropped while streaming
+
+
+@functools.lru_cache(maxsize=None)
+def _forkserver():
+    """
+    The multiprocessing context the in-process runs fork from. Its server is
+    started on first use as a fresh, single-threaded interpreter that imports
+    the main module, pytest and this module once; every test run forks from it.
+    """
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["__main__", "pytest", __name__])
+    return context
+
+
+def _run_runner(cmd, output_path):
+    """Forkserver child: runs pytest / unittest with stdout and stderr sent to *output_path*."""
+    with open(output_path, "w") as output:
+        os.dup2(output.fileno(), 1)
+        os.dup2(output.fileno(), 2)
+    if cmd[0] == "pytest":
+        import pytest  # already imported by the forkserver
+        code = int(pytest.main(cmd[1:]))
+    else:
+        program = unittest.main(module=None, argv=["python -m unittest", *cmd[3:]], exit=False)
+        code = 0 if program.result.wasSuccessful() else 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    sys.exit(code)
 
 class Judge:
-    def __init__(self, groq_key):
+    # file path → (sha1 of its source, _fallback_syntax_check result); shared by all instances
+    _syntax_cache: dict[str, tuple[bytes, tuple[bool, str]]] = {}
+
+    def __init__(self, groq_key, in_process=False):
         self.groq_key = groq_key
+        # Run pytest/unittest in a child forked from a preloaded forkserver instead of a fresh interpreter
+        self.in_process = in_process and "forkserver" in multiprocessing.get_all_start_methods()
     
     def run_tests(self, file_path):
         """
@@ -15,6 +64,17 @@ class Judge:
         - <filename>_test.py
         - tests/ directory
         """
+        test_file = self._find_test_file(file_path)
+        
+        if not test_file:
+            # No test file found - try running pytest/unittest on the directory
+            return self._run_pytest_or_unittest(os.path.dirname(file_path), file_path)
+        
+        # Run the specific test file
+        return self._run_test_file(test_file)
+
+    def _find_test_file(self, file_path):
+        """Returns the first existing test file for *file_path*, or None."""
         # Get the directory and filename
         directory = os.path.dirname(file_path)
         filename = os.path.basename(file_path)
@@ -29,31 +89,94 @@ class Judge:
             os.path.join(os.path.dirname(directory), "tests", f"test_{filename}"),
         ]
         
-        test_file = None
         for pattern in test_patterns:
             if os.path.exists(pattern):
-                test_file = pattern
-                break
-        
-        if not test_file:
-            # No test file found - try running pytest/unittest on the directory
-            return self._run_pytest_or_unittest(directory, file_path)
-        
-        # Run the specific test file
-        return self._run_test_file(test_file)
-    
+                return pattern
+        return None
+
+    async def run_tests_async(self, file_path, executor=None):
+        """
+        Async variant of run_tests. The usual case (a test file next to the
+        source, run by pytest) is an asyncio subprocess awaited on the loop;
+        the discovery and unittest fallbacks run run_tests on *executor*
+        (the loop's default executor when None).
+        """
+        test_file = self._find_test_file(file_path)
+        if test_file and not self.in_process:
+            try:
+                returncode, test_output, _ = await self._run_streaming_async(["pytest", test_file, "-v"])
+                return returncode == 0, test_output
+            except FileNotFoundError:
+                pass  # pytest not installed, run_tests falls back to unittest
+            except subprocess.TimeoutExpired:
+                return False, "Tests timed out"
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.run_tests, file_path)
+
+    def run_tests_batch(self, test_files):
+        """
+        Runs several test files in a single pytest process, so pytest's startup
+        is paid once for the whole batch.
+        Returns ({test_file: passed}, logs). Verdicts come from pytest's JUnit XML
+        report, not the truncated log: a file passes only if the report holds at
+        least one test case for it and none failed or errored.
+        """
+        fd, report = tempfile.mkstemp(suffix=".xml")
+        os.close(fd)
+        try:
+            try:
+                _, test_output, _ = self._run(
+                    # One file failing to import must not stop the others from running;
+                    # xunit1 records each test case's file
+                    ["pytest", "-q", "-rfE", "--continue-on-collection-errors",
+                     "-o", "junit_family=xunit1", f"--junitxml={report}", *test_files],
+                    timeout=TEST_TIMEOUT * len(test_files),
+                )
+            except FileNotFoundError:
+                # pytest not installed: fall back to one unittest run per file
+                results = {test_file: self._run_test_file(test_file) for test_file in test_files}
+                return (
+                    {test_file: ok for test_file, (ok, _) in results.items()},
+                    "\n".join(logs for _, logs in results.values()),
+                )
+            except subprocess.TimeoutExpired:
+                return {test_file: False for test_file in test_files}, "Tests timed out"
+            return self._batch_verdicts(report, test_files), test_output
+        finally:
+            os.remove(report)
+
+    @staticmethod
+    def _batch_verdicts(report, test_files):
+        """Per-file verdicts from a JUnit XML report; files it cannot confirm fail."""
+        try:
+            cases = ElementTree.parse(report).iter("testcase")
+            # file → passed, for every file with at least one test case
+            outcomes = {}
+            for case in cases:
+                # Paths are relative to pytest's rootdir
+                path = os.path.normpath(case.get("file", ""))
+                failed = case.find("failure") is not None or case.find("error") is not None
+                outcomes[path] = outcomes.get(path, True) and not failed
+        except (OSError, ElementTree.ParseError):
+            return {test_file: False for test_file in test_files}
+
+        verdicts = {}
+        for test_file in test_files:
+            absolute = os.path.abspath(test_file)
+            matches = [
+                ok for path, ok in outcomes.items()
+                if path != "." and (absolute == path or absolute.endswith(os.sep + path))
+            ]
+            verdicts[test_file] = bool(matches) and all(matches)
+        return verdicts
+
     def _run_test_file(self, test_file):
         """Run a specific test file using pytest or unittest."""
         # Try pytest first
         try:
-            result = subprocess.run(
-                ["pytest", test_file, "-v"],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            test_output = result.stdout + result.stderr
-            success = result.returncode == 0
+            returncode, test_output, _ = self._run(["pytest", test_file, "-v"])
+            success = returncode == 0
             return success, test_output
         except FileNotFoundError:
             pass  # pytest not installed, try unittest
@@ -62,14 +185,8 @@ class Judge:
         
         # Try unittest
         try:
-            result = subprocess.run(
-                ["python", "-m", "unittest", test_file],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            test_output = result.stdout + result.stderr
-            success = result.returncode == 0
+            returncode, test_output, _ = self._run(["python", "-m", "unittest", test_file])
+            success = returncode == 0
             return success, test_output
         except subprocess.TimeoutExpired:
             return False, "Tests timed out"
@@ -80,19 +197,16 @@ class Judge:
         """Run pytest or unittest discovery on the directory."""
         # Try pytest discovery
         try:
-            result = subprocess.run(
+            returncode, test_output, no_tests = self._run(
                 ["pytest", directory, "-v"],
-                capture_output=True,
-                text=True,
-                timeout=30
+                markers=("no tests ran", "collected 0 items"),
             )
-            test_output = result.stdout + result.stderr
             
             # Check if any tests were found
-            if "no tests ran" in test_output.lower() or "collected 0 items" in test_output.lower():
+            if no_tests:
                 return self._fallback_syntax_check(file_path)
             
-            success = result.returncode == 0
+            success = returncode == 0
             return success, test_output
         except FileNotFoundError:
             pass  # pytest not installed
@@ -101,40 +215,168 @@ class Judge:
         
         # Try unittest discovery
         try:
-            result = subprocess.run(
+            returncode, test_output, no_tests = self._run(
                 ["python", "-m", "unittest", "discover", "-s", directory, "-v"],
-                capture_output=True,
-                text=True,
-                timeout=30
+                markers=("ran 0 tests",),
             )
-            test_output = result.stdout + result.stderr
             
             # Check if any tests were found
-            if "Ran 0 tests" in test_output:
+            if no_tests:
                 return self._fallback_syntax_check(file_path)
             
-            success = result.returncode == 0
+            success = returncode == 0
             return success, test_output
         except subprocess.TimeoutExpired:
             return False, "Tests timed out"
         except Exception as e:
             return self._fallback_syntax_check(file_path)
     
+    def _run(self, cmd, markers=(), timeout=TEST_TIMEOUT):
+        """Runs a pytest / unittest command in-process (forked) or as a subprocess."""
+        if self.in_process:
+            return self._run_forked(cmd, markers, timeout)
+        return self._run_streaming(cmd, markers, timeout)
+
+    def _run_forked(self, cmd, markers=(), timeout=TEST_TIMEOUT):
+        """
+        In-process counterpart of _run_streaming for "pytest ..." and
+        "python -m unittest ..." commands: the runner is called in a child
+        forked from a forkserver that already imported pytest, instead of
+        booting a new interpreter, while the code under test is still imported
+        fresh on every run. The server is a single-threaded interpreter of its
+        own, so forking never copies this process's threads or their locks.
+        Same return value and exceptions as _run_streaming.
+        """
+        if cmd[0] == "pytest" and importlib.util.find_spec("pytest") is None:
+            raise FileNotFoundError("pytest")
+
+        tail = deque(maxlen=LOG_TAIL_LINES)
+        marker_seen = False
+
+        fd, output_path = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+        try:
+            child = _forkserver().Process(target=_run_runner, args=(cmd, output_path), daemon=True)
+            child.start()
+            child.join(timeout)
+            if child.is_alive():
+                child.kill()
+                child.join()
+                raise subprocess.TimeoutExpired(cmd, timeout)
+
+            with open(output_path, errors="replace") as output:
+                for line in output:
+                    tail.append(line)
+                    if markers and not marker_seen:
+                        lowered = line.lower()
+                        marker_seen = any(marker in lowered for marker in markers)
+        finally:
+            os.remove(output_path)
+        return child.exitcode, "".join(tail), marker_seen
+
+    def _run_streaming(self, cmd, markers=(), timeout=TEST_TIMEOUT):
+        """
+        Runs *cmd* and reads its combined stdout/stderr line by line, so only
+        the last LOG_TAIL_LINES lines are ever held in memory.
+        Returns (returncode, output_tail, marker_seen) where marker_seen tells
+        whether any of the lowercase *markers* appeared in the full output.
+        Raises FileNotFoundError / subprocess.TimeoutExpired like subprocess.run.
+        """
+        tail = deque(maxlen=LOG_TAIL_LINES)
+        marker_seen = False
+        timed_out = threading.Event()
+
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True) as proc:
+            def kill():
+                timed_out.set()
+                proc.kill()
+
+            timer = threading.Timer(timeout, kill)
+            timer.start()
+            try:
+                for line in proc.stdout:
+                    tail.append(line)
+                    if markers and not marker_seen:
+                        lowered = line.lower()
+                        marker_seen = any(marker in lowered for marker in markers)
+                returncode = proc.wait()
+            finally:
+                timer.cancel()
+
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return returncode, "".join(tail), marker_seen
+
+    async def _run_streaming_async(self, cmd, markers=(), timeout=TEST_TIMEOUT):
+        """
+        Async variant of _run_streaming on an asyncio subprocess: no thread is
+        held while the tests run. Same return value and exceptions.
+        """
+        tail = deque(maxlen=LOG_TAIL_LINES)
+        marker_seen = False
+
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+
+        def add_line(raw):
+            nonlocal marker_seen
+            line = raw.decode(errors="replace")
+            tail.append(line)
+            if markers and not marker_seen:
+                lowered = line.lower()
+                marker_seen = any(marker in lowered for marker in markers)
+
+        async def read_output():
+            # Fixed-size reads split into lines here: StreamReader's line reader
+            # raises on lines over its 64 KiB limit (e.g. a large assertion diff)
+            pending = b""
+            while chunk := await proc.stdout.read(65536):
+                *lines, pending = (pending + chunk).split(b"\n")
+                for raw in lines:
+                    add_line(raw + b"\n")
+            if pending:
+                add_line(pending)
+            return await proc.wait()
+
+        try:
+            returncode = await asyncio.wait_for(read_output(), timeout)
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        finally:
+            # Reap the child whatever interrupted the read (timeout, cancellation, an error)
+            if proc.returncode is None:
+                with contextlib.suppress(ProcessLookupError):
+                    proc.kill()
+                await proc.wait()
+        return returncode, "".join(tail), marker_seen
+    
     def _fallback_syntax_check(self, file_path):
         """
         Fallback when no unit tests are found.
         At minimum, check if the Python file has valid syntax.
         """
         try:
-            # Try to compile the Python file
             with open(file_path, 'r', encoding='utf-8') as f:
                 code = f.read()
-            
-            compile(code, file_path, 'exec')
+        except Exception as e:
+            return False, f"❌ Error checking file: {str(e)}"
+
+        # Unchanged since the last check: reuse its verdict instead of compiling again
+        digest = hashlib.sha1(code.encode()).digest()
+        cached = self._syntax_cache.get(file_path)
+        if cached and cached[0] == digest:
+            return cached[1]
+
+        try:
+            # Try to parse the Python file (no bytecode is generated)
+            ast.parse(code, filename=file_path)
             
             # If it compiles, return success with a note
-            return True, f"✅ No unit tests found, but {os.path.basename(file_path)} has valid Python syntax."
+            result = True, f"✅ No unit tests found, but {os.path.basename(file_path)} has valid Python syntax."
         except SyntaxError as e:
-            return False, f"❌ Syntax Error: {str(e)}"
+            result = False, f"❌ Syntax Error: {str(e)}"
         except Exception as e:
-            return False, f"❌ Error checking file: {str(e)}"
+            result = False, f"❌ Error checking file: {str(e)}"
+        self._syntax_cache[file_path] = (digest, result)
+        return result
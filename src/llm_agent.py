@@ -0,0 +1,104 @@
+import asyncio
+import contextlib
+from typing import TYPE_CHECKING, AsyncContextManager, Callable, ClassVar
+
+from src.utils import llm_cache
+from src.utils.llm_utils import send, send_async
+
+# groq is only needed for a client built here (one is normally injected)
+if TYPE_CHECKING:
+    from groq import AsyncGroq, Groq
+
+
+class LLMAgent:
+    """
+    Shared plumbing of the Groq-backed agents (Auditor, Tester, Fixer): client
+    handling, source reading, message assembly and the cached request path.
+    Subclasses only build their prompts and handle the response text.
+    """
+
+    MODEL: ClassVar[str] = "llama-3.3-70b-versatile"  # Fast and capable model
+    # Whether usable responses are cached and identical requests answered from the cache
+    CACHE_RESPONSES: ClassVar[bool] = True
+
+    def __init__(self, groq_key: str | None = None, client: "Groq | None" = None,
+                 async_client: "AsyncGroq | None" = None):
+        self.groq_key = groq_key
+        # Shared Groq client (connection pool); when absent one is built on first use and kept
+        self.client = client
+        # Shared AsyncGroq client: the *_async methods await it instead of blocking a worker thread
+        self.async_client = async_client
+
+    def _get_client(self, groq_key: str | None = None) -> "Groq":
+        """Returns the injected client, or one built on first use so later calls reuse its connections."""
+        if self.client is None:
+            from groq import Groq  # imported only when no client was injected
+            self.client = Groq(api_key=groq_key or self.groq_key)
+        return self.client
+
+    def _cache_key(self, request: dict) -> str | None:
+        return llm_cache.request_key(request) if self.CACHE_RESPONSES else None
+
+    def call(self, request: dict, no_cache: bool = False, groq_key: str | None = None) -> tuple[str, str | None]:
+        """
+        Returns (response text, key). An identical earlier request that proved
+        usable is answered from the response cache unless no_cache is set.
+        A fresh answer is not cached yet: the caller passes *key* to remember()
+        once the text parsed or applied successfully. key is None when there is
+        nothing to remember (cache hit, or caching disabled for this agent).
+        """
+        key = self._cache_key(request)
+        if key is not None and not no_cache:
+            cached = llm_cache.get_response(key)
+            if cached is not None:
+                return cached, None
+        return send(self._get_client(groq_key), request), key
+
+    async def call_async(self, request: dict, no_cache: bool = False, groq_key: str | None = None,
+                         slot: Callable[[], AsyncContextManager] | None = None) -> tuple[str, str | None]:
+        """
+        Async variant of call: awaits the AsyncGroq client when one was injected,
+        otherwise runs the blocking call in a worker thread. *slot* (e.g. the
+        orchestrator's concurrency / rate-limit guard) is only entered for a
+        request that actually goes to Groq, never for a cache hit.
+        """
+        key = self._cache_key(request)
+        if key is not None and not no_cache:
+            cached = await asyncio.to_thread(llm_cache.get_response, key)
+            if cached is not None:
+                return cached, None
+        async with slot() if slot is not None else contextlib.nullcontext():
+            if self.async_client is None:
+                text = await asyncio.to_thread(send, self._get_client(groq_key), request)
+            else:
+                text = await send_async(self.async_client, request)
+        return text, key
+
+    def remember(self, key: str | None, text: str) -> None:
+        """Caches a response that proved usable (see call)."""
+        if key is not None:
+            llm_cache.put_response(key, text)
+
+    async def remember_async(self, key: str | None, text: str) -> None:
+        """Async variant of remember; the cache is written off the loop."""
+        if key is not None:
+            await asyncio.to_thread(llm_cache.put_response, key, text)
+
+    def _request(self, system_message: dict, prompt: str, temperature: float, max_tokens: int,
+                 stream: bool = False) -> dict:
+        """Builds the chat-completion arguments for one system message + user prompt."""
+        request = dict(
+            messages=[system_message, {"role": "user", "content": prompt}],
+            model=self.MODEL,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        if stream:
+            request["stream"] = True
+        return request
+
+    @staticmethod
+    def _read_source(file_path: str) -> str:
+        """Returns the text of *file_path*."""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
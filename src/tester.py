@@ -1,17 +1,30 @@
 import os
-import json
-from groq import Groq
+import logging
 
+from src.llm_agent import LLMAgent
+from src.utils.llm_utils import dumps_json, strip_fences
 
-class Tester:
+logger = logging.getLogger(__name__)
+
+# Built once and shared (read-only) by every request
+TESTER_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": (
+        "You are a Python test engineer. "
+        "Return only valid Python pytest code, nothing else."
+    ),
+}
+
+
+class Tester(LLMAgent):
     """
     Tester Agent — generates unit tests for a Python file using Groq AI.
     Follows TDD: writes tests that may initially fail, then the Fixer repairs
     the code until the Judge confirms all tests pass.
     """
 
-    def __init__(self, groq_key: str):
-        self.groq_key = groq_key
+    # Tests are regenerated for every request rather than replayed from the response cache
+    CACHE_RESPONSES = False
 
     def generate_tests(self, file_path: str, plan: dict | None = None) -> str:
         """
@@ -20,8 +33,21 @@ class Tester:
 
         Returns the path of the generated test file.
         """
-        with open(file_path, "r", encoding="utf-8") as f:
-            source_code = f.read()
+        request, test_file_path = self._tests_request(file_path, plan)
+        response_text, _ = self.call(request)
+        return self._write_tests(response_text, test_file_path)
+
+    async def generate_tests_async(self, file_path: str, plan: dict | None = None, slot=None) -> str:
+        """
+        Async variant of generate_tests (see LLMAgent.call_async for *slot*).
+        """
+        request, test_file_path = self._tests_request(file_path, plan)
+        response_text, _ = await self.call_async(request, slot=slot)
+        return self._write_tests(response_text, test_file_path)
+
+    def _tests_request(self, file_path: str, plan: dict | None) -> tuple[dict, str]:
+        """Builds the chat-completion arguments and the path the tests will be written to."""
+        source_code = self._read_source(file_path)
 
         filename = os.path.basename(file_path)
         module_name = os.path.splitext(filename)[0]
@@ -32,7 +58,7 @@ class Tester:
         # Build the prompt
         plan_section = ""
         if plan:
-            plan_section = f"\n\nRefactoring plan (known issues to test for):\n{json.dumps(plan, indent=2)}"
+            plan_section = f"\n\nRefactoring plan (known issues to test for):\n{dumps_json(plan)}"
 
         prompt = f"""You are an expert Python test engineer following TDD principles.
 
@@ -51,36 +77,17 @@ Source file ({filename}):
 {source_code}
 """
 
-        client = Groq(api_key=self.groq_key)
-
-        response = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a Python test engineer. "
-                        "Return only valid Python pytest code, nothing else."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.1,
-            max_tokens=4096,
-        )
-
-        test_code = response.choices[0].message.content.strip()
+        # Streamed: a long test file arrives as it is generated instead of in one final read
+        request = self._request(TESTER_SYSTEM_MESSAGE, prompt, temperature=0.1, max_tokens=4096, stream=True)
+        return request, test_file_path
 
+    def _write_tests(self, response_text: str, test_file_path: str) -> str:
+        """Writes the model's test code to *test_file_path* and returns that path."""
         # Strip markdown fences if the model added them
-        if test_code.startswith("```python"):
-            test_code = test_code.split("```python", 1)[1]
-            test_code = test_code.rsplit("```", 1)[0].strip()
-        elif test_code.startswith("```"):
-            test_code = test_code.split("```", 1)[1]
-            test_code = test_code.rsplit("```", 1)[0].strip()
+        test_code = strip_fences(response_text)
 
         with open(test_file_path, "w", encoding="utf-8") as f:
             f.write(test_code)
 
-        print(f"  🧪 Tester wrote: {test_file_path}")
-        return test_file_path
\ No newline at end of file
+        logger.info("  🧪 Tester wrote: %s", test_file_path)
+        return test_file_path
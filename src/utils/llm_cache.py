@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent store of LLM results, survives restarts:
+#   plans     — Auditor plans keyed by SHA-256 of the audited source, so re-running
+#               the swarm on unchanged files skips the Auditor;
+#   responses — raw response texts keyed by SHA-256 of the request, so an identical
+#               request is answered from disk instead of calling Groq again.
+# One connection is opened on first use and shared (behind a lock) by the worker
+# threads async callers hand these blocking calls to.
+CACHE_FILE = os.path.join("logs", "llm_cache.db")
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+def _connection() -> sqlite3.Connection:
+    """Opens the database and creates its tables once per process; callers hold _lock."""
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        conn = sqlite3.connect(CACHE_FILE, check_same_thread=False)
+        # WAL with NORMAL sync: a commit appends to the log instead of fsyncing the database
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS plans (hash TEXT PRIMARY KEY, plan TEXT, ts INTEGER)")
+        conn.execute("CREATE TABLE IF NOT EXISTS responses (hash TEXT PRIMARY KEY, response TEXT, ts INTEGER)")
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _get(table: str, column: str, key: str) -> str | None:
+    with _lock:
+        row = _connection().execute(f"SELECT {column} FROM {table} WHERE hash = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _put(table: str, column: str, key: str, value: str) -> None:
+    with _lock:
+        conn = _connection()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {table} (hash, {column}, ts) VALUES (?, ?, ?)",
+                (key, value, int(time.time())),
+            )
+
+
+def get_plan(key: str) -> dict | None:
+    """Returns the cached plan for a source hash, or None on a miss."""
+    plan = _get("plans", "plan", key)
+    return json.loads(plan) if plan is not None else None
+
+
+def put_plan(key: str, plan: dict) -> None:
+    """Stores (or replaces) the plan for a source hash."""
+    _put("plans", "plan", key, json.dumps(plan))
+
+
+def request_key(request: dict) -> str:
+    """Hashes a chat-completion request; streaming does not change the answer, so it is left out."""
+    payload = {name: value for name, value in request.items() if name != "stream"}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def get_response(key: str) -> str | None:
+    """Returns the cached response text for a request hash, or None on a miss."""
+    return _get("responses", "response", key)
+
+
+def put_response(key: str, response: str) -> None:
+    """Stores (or replaces) the response text for a request hash."""
+    _put("responses", "response", key, response)
@@ -0,0 +1,27 @@
+import importlib.util
+from typing import TYPE_CHECKING
+
+# httpx and groq are imported on first use, so importing this module stays cheap
+if TYPE_CHECKING:
+    from groq import AsyncGroq
+
+
+def create_groq_client(groq_key: str, timeout: float) -> "AsyncGroq":
+    """
+    Builds the single Groq client shared by all agents, so its keep-alive pool
+    is reused across files instead of opening a new TLS connection per call.
+    It is async: agents await their requests on the event loop instead of
+    parking a worker thread per call in flight.
+
+    When the optional h2 package is installed the pool speaks HTTP/2, so
+    concurrent requests are multiplexed over one TLS connection.
+    """
+    import httpx
+    from groq import AsyncGroq
+
+    http_client = httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        http2=importlib.util.find_spec("h2") is not None,
+    )
+    return AsyncGroq(api_key=groq_key, http_client=http_client)
@@ -0,0 +1,82 @@
+import asyncio
+import functools
+import json
+import re
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable
+
+# orjson (optional) parses and dumps LLM JSON in C; stdlib json is the fallback.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Shared plumbing for the LLM agents (Auditor, Tester, Fixer).
+
+# Resolved once at import, so prompt reads do not walk ".." components
+PROMPTS_DIR = Path(__file__).resolve().parent.parent.parent / "prompts"
+
+# A markdown fence around the whole response (```python / ```json / ```); the closing fence is optional
+_FENCE_RE = re.compile(r"^```(?:python|json)?[^\S\n]*\n?(.*?)(?:\n?```)?\s*$", re.DOTALL)
+
+
+def strip_fences(text: str) -> str:
+    """Returns the model's answer without the markdown code fence it may be wrapped in."""
+    text = text.strip()
+    match = _FENCE_RE.match(text)
+    return match.group(1).strip() if match else text
+
+
+def join_stream(stream) -> str:
+    """Concatenates the text deltas of a streamed chat completion."""
+    return "".join(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+
+
+async def join_stream_async(stream) -> str:
+    """Async variant of join_stream for an AsyncGroq stream."""
+    parts = []
+    async for chunk in stream:
+        if chunk.choices:
+            parts.append(chunk.choices[0].delta.content or "")
+    return "".join(parts)
+
+
+def send(client, request: dict) -> str:
+    """Sends a chat-completion request and returns the response text (streamed or not)."""
+    response = client.chat.completions.create(**request)
+    return join_stream(response) if request.get("stream") else response.choices[0].message.content
+
+
+async def send_async(client, request: dict) -> str:
+    """Async variant of send for an AsyncGroq client."""
+    response = await client.chat.completions.create(**request)
+    return await join_stream_async(response) if request.get("stream") else response.choices[0].message.content
+
+
+def loads_json(text: str):
+    """Parses a JSON document from a model response."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def dumps_json(obj) -> str:
+    """Pretty-prints *obj* (2-space indent) for inclusion in a prompt."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+
+@functools.lru_cache(maxsize=None)
+def load_prompt(name: str) -> str:
+    """Returns prompts/<name>; each template is read from disk once per process."""
+    return (PROMPTS_DIR / name).read_text(encoding="utf-8")
+
+
+async def gather_calls(calls: Iterable[Callable[[], Awaitable]]) -> list:
+    """
+    Runs the zero-argument coroutine factories concurrently and returns their
+    results in order; a failed call yields its exception instead of raising.
+    """
+    return await asyncio.gather(*(call() for call in calls), return_exceptions=True)
@@ -1,12 +1,23 @@
 import json
 import os
+import threading
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
 from enum import Enum
 
 # Chemin du fichier de logs
 LOG_FILE = os.path.join("logs", "experiment_data.json")
 
+# Entrées validées mais pas encore écrites (voir buffered_logging / flush_experiment_log)
+_pending: list[dict] = []
+_buffering = False
+_lock = threading.Lock()        # protège _pending seulement (pris brièvement, y compris depuis la boucle asyncio)
+_write_lock = threading.Lock()  # sérialise les écritures du fichier, dans l'ordre des entrées
+
+# Valeurs de REFACTOR_LOG_DISABLE qui désactivent la journalisation ("0", "false"... la laissent active)
+_DISABLE_VALUES = frozenset({"1", "true", "yes"})
+
 class ActionType(str, Enum):
     """
     Énumération des types d'actions possibles pour standardiser l'analyse.
@@ -25,12 +36,17 @@ def log_experiment(agent_name: str, model_used: str, action: ActionType, details
         model_used (str): Modèle LLM utilisé (ex: "gemini-1.5-flash").
         action (ActionType): Le type d'action effectué (utiliser l'Enum ActionType).
         details (dict): Dictionnaire contenant les détails. DOIT contenir 'input_prompt' et 'output_response'.
+            'output_response' peut être un objet (ex: un plan) : il est sérialisé en JSON
+            seulement à l'écriture, hors du chemin critique.
         status (str): "SUCCESS" ou "FAILURE".
 
     Raises:
         ValueError: Si les champs obligatoires sont manquants dans 'details' ou si l'action est invalide.
     """
-    
+    # Journalisation désactivée (ex: benchmarks) : rien n'est validé ni sérialisé
+    if os.getenv("REFACTOR_LOG_DISABLE", "").strip().lower() in _DISABLE_VALUES:
+        return
+
     # --- 1. VALIDATION DU TYPE D'ACTION ---
     # Permet d'accepter soit l'objet Enum, soit la chaîne de caractères correspondante
     valid_actions = [a.value for a in ActionType]
@@ -56,9 +72,6 @@ def log_experiment(agent_name: str, model_used: str, action: ActionType, details
             )
 
     # --- 3. PRÉPARATION DE L'ENTRÉE ---
-    # Création du dossier logs s'il n'existe pas
-    os.makedirs("logs", exist_ok=True)
-    
     entry = {
         "id": str(uuid.uuid4()),  # ID unique pour éviter les doublons lors de la fusion des données
         "timestamp": datetime.now().isoformat(),
@@ -69,6 +82,49 @@ def log_experiment(agent_name: str, model_used: str, action: ActionType, details
         "status": status
     }
 
+    with _lock:
+        _pending.append(entry)
+    # Hors mode tampon, chaque entrée est écrite immédiatement (comportement historique)
+    if not _buffering:
+        flush_experiment_log()
+
+
+def flush_experiment_log():
+    """
+    Écrit d'un coup toutes les entrées en attente : une seule lecture/réécriture
+    du fichier JSON, quel que soit le nombre d'entrées accumulées.
+    _lock n'est tenu que le temps de vider _pending : log_experiment n'attend
+    jamais la lecture/réécriture du fichier, protégée par _write_lock.
+    """
+    # _write_lock d'abord : deux vidages concurrents écrivent dans l'ordre des entrées
+    with _write_lock:
+        with _lock:
+            if not _pending:
+                return
+            entries = _pending[:]
+            _pending.clear()
+
+        # Création du dossier logs s'il n'existe pas
+        os.makedirs("logs", exist_ok=True)
+        _write_entries(entries)
+
+
+@contextmanager
+def buffered_logging():
+    """
+    Regroupe les écritures de log_experiment : les entrées sont gardées en mémoire
+    et écrites par flush_experiment_log (appelé par l'appelant, et toujours en sortie).
+    """
+    global _buffering
+    _buffering = True
+    try:
+        yield
+    finally:
+        _buffering = False
+        flush_experiment_log()
+
+
+def _write_entries(entries: list[dict]):
     # --- 4. LECTURE & ÉCRITURE ROBUSTE ---
     data = []
     if os.path.exists(LOG_FILE):
@@ -82,7 +138,13 @@ def log_experiment(agent_name: str, model_used: str, action: ActionType, details
             print(f"⚠️ Attention : Le fichier de logs {LOG_FILE} était corrompu. Une nouvelle liste a été créée.")
             data = []
 
-    data.append(entry)
+    # Sérialisation différée des réponses non textuelles (plans, listes...)
+    for entry in entries:
+        response = entry["details"].get("output_response")
+        if response is not None and not isinstance(response, str):
+            entry["details"]["output_response"] = json.dumps(response, default=str, ensure_ascii=False)
+
+    data.extend(entries)
     
     # Écriture
     with open(LOG_FILE, 'w', encoding='utf-8') as f:
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+# Groq's free tier allows 30 requests per minute per model
+DEFAULT_GROQ_RPM = 30
+
+
+class GroqRateLimiter:
+    """
+    Token bucket sized to Groq's requests-per-minute quota. Calls go through
+    immediately while tokens remain and only wait once the budget is spent,
+    instead of pausing a fixed time before every request.
+    """
+
+    def __init__(self, rpm: int = DEFAULT_GROQ_RPM):
+        self.rpm = max(1, rpm)
+        self.tokens = float(self.rpm)
+        self.last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.rpm, self.tokens + (now - self.last_refill) * self.rpm / 60)
+        self.last_refill = now
+
+    async def acquire(self) -> None:
+        """Takes one request token, sleeping only as long as the bucket needs to refill it."""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) * 60 / self.rpm)
+                self._refill()
+            self.tokens -= 1
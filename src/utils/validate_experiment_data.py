@@ -1,11 +1,20 @@
+import itertools
 import json
 import os
 import sys
 from src.utils.logger import ActionType  # <- on importe la vraie classe
 
+# ijson (optionnel) lit les entrées une à une au lieu de charger tout le fichier
+try:
+    import ijson
+    JSON_ERRORS = (ijson.JSONError, ValueError)
+except ImportError:
+    ijson = None
+    JSON_ERRORS = (ValueError,)  # json.JSONDecodeError, UnicodeDecodeError
+
 LOG_FILE = os.path.join("logs", "experiment_data.json")
 
-REQUIRED_FIELDS = [
+REQUIRED_FIELDS = frozenset([
     "id",
     "timestamp",
     "agent",
@@ -13,58 +22,76 @@ REQUIRED_FIELDS = [
     "action",
     "details",
     "status"
-]
+])
 
-REQUIRED_DETAIL_FIELDS = [
+REQUIRED_DETAIL_FIELDS = frozenset([
     "input_prompt",
     "output_response"
-]
+])
 
 # Noms d'agents autorisés
-VALID_AGENTS = ["Auditor_Agent", "Fixer_Agent", "Judge_Agent"]
+VALID_AGENTS = frozenset(["Auditor_Agent", "Fixer_Agent", "Judge_Agent"])
+
+# Toutes les valeurs de l'enum, calculées une seule fois
+VALID_ACTIONS = frozenset(a.value for a in ActionType)
 
 def fail(message: str):
     print(f"❌ Validation Error: {message}")
     sys.exit(1)
 
+def iter_entries(f):
+    """Renvoie les entrées du tableau JSON racine (rien si la racine n'est pas une liste)."""
+    if ijson is not None:
+        # Analyse en flux : une entrée en mémoire à la fois. Le préfixe "item"
+        # correspond aussi à une clé "item" d'un objet racine : on vérifie donc
+        # d'abord que la racine est bien un tableau.
+        events = ijson.parse(f)
+        first = next(events, None)
+        if first is None or first[1] != "start_array":
+            return []
+        return ijson.items(itertools.chain([first], events), "item")
+    data = json.load(f)
+    return data if isinstance(data, list) else []
+
 def validate():
     if not os.path.exists(LOG_FILE):
         fail("experiment_data.json file does not exist.")
 
-    with open(LOG_FILE, "r", encoding="utf-8") as f:
+    index = -1
+    with open(LOG_FILE, "rb") as f:
         try:
-            data = json.load(f)
-        except json.JSONDecodeError:
+            for index, entry in enumerate(iter_entries(f)):
+                validate_entry(index, entry)
+        except JSON_ERRORS:
             fail("experiment_data.json is not valid JSON.")
 
-    if not isinstance(data, list) or len(data) == 0:
+    if index < 0:
         fail("experiment_data.json must be a non-empty list.")
 
-    valid_actions = [a.value for a in ActionType]  # <- toutes les valeurs de l'enum
-
-    for index, entry in enumerate(data):
-        if not isinstance(entry, dict):
-            fail(f"Entry #{index} is not a JSON object.")
+    print("✅ experiment_data.json validation SUCCESS.")
+    sys.exit(0)
 
-        for field in REQUIRED_FIELDS:
-            if field not in entry:
-                fail(f"Missing field '{field}' in entry #{index}.")
+def validate_entry(index, entry):
+    if not isinstance(entry, dict):
+        fail(f"Entry #{index} is not a JSON object.")
 
-        if entry["agent"] not in VALID_AGENTS:
-            fail(f"Invalid agent_name '{entry['agent']}' in entry #{index}.")
+    # Différence d'ensembles : tous les champs manquants en un seul appel
+    missing = REQUIRED_FIELDS - entry.keys()
+    if missing:
+        fail(f"Missing field(s) {', '.join(sorted(missing))} in entry #{index}.")
 
-        if entry["action"] not in valid_actions:
-            fail(f"Invalid action '{entry['action']}' in entry #{index}.")
+    if entry["agent"] not in VALID_AGENTS:
+        fail(f"Invalid agent_name '{entry['agent']}' in entry #{index}.")
 
-        if not isinstance(entry["details"], dict):
-            fail(f"'details' must be an object in entry #{index}.")
+    if entry["action"] not in VALID_ACTIONS:
+        fail(f"Invalid action '{entry['action']}' in entry #{index}.")
 
-        for detail_field in REQUIRED_DETAIL_FIELDS:
-            if detail_field not in entry["details"]:
-                fail(f"Missing '{detail_field}' in details of entry #{index}.")
+    if not isinstance(entry["details"], dict):
+        fail(f"'details' must be an object in entry #{index}.")
 
-    print("✅ experiment_data.json validation SUCCESS.")
-    sys.exit(0)
+    missing = REQUIRED_DETAIL_FIELDS - entry["details"].keys()
+    if missing:
+        fail(f"Missing {', '.join(sorted(missing))} in details of entry #{index}.")
 
 if __name__ == "__main__":
     validate()
@@ -0,0 +1,71 @@
+import asyncio
+
+import main
+
+FAILURE = "FAILED test_target.py::test_fixed - AssertionError"
+
+
+class StubAuditor:
+    def __init__(self):
+        self.failure_logs = []
+
+    async def analyze_async(self, file_path, groq_key=None, no_cache=False, slot=None, failure_logs=None):
+        self.failure_logs.append(failure_logs)
+        issue = "re-audited" if failure_logs else "first audit"
+        return {"file": file_path, "issues": [issue]}
+
+
+class StubTester:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_tests_async(self, file_path, plan=None, slot=None):
+        self.calls += 1
+        return file_path + ".test"
+
+
+class StubFixer:
+    """Leaves the file unchanged until it gets a re-audited plan with the failure logs."""
+
+    def __init__(self):
+        self.plans = []
+
+    async def apply_fix_async(self, plan, self_check=False, no_cache=False, slot=None):
+        self.plans.append(plan)
+        if plan["issues"] == ["re-audited"] and plan.get("prior_failure_logs"):
+            with open(plan["file"], "a", encoding="utf-8") as f:
+                f.write("# fixed\n")
+        return {"expected_to_pass": False, "confidence": 0}
+
+    async def confirm_async(self, file_path):
+        pass
+
+
+class StubJudge:
+    async def run_tests_async(self, file_path, executor=None):
+        with open(file_path, encoding="utf-8") as f:
+            fixed = "# fixed" in f.read()
+        return (True, "1 passed") if fixed else (False, FAILURE)
+
+
+def test_unchanged_file_is_reaudited_with_the_failure_logs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("REFACTOR_LOG_DISABLE", "1")
+    monkeypatch.setattr(main, "_plan_cache", {})
+    target = tmp_path / "target.py"
+    target.write_text("x = 1\n", encoding="utf-8")
+
+    config = main.Config(target_dir=str(tmp_path), groq_key="test", no_cache=True)
+    auditor, tester, fixer = StubAuditor(), StubTester(), StubFixer()
+    monkeypatch.setitem(main._agents, "test", {
+        "auditor": auditor, "tester": tester, "fixer": fixer, "judge": StubJudge(),
+    })
+    nodes = main.build_nodes(config)
+    workflow = main.build_workflow(nodes, 4)
+
+    assert asyncio.run(main.process_file(workflow, nodes, str(target), 4))
+    # Iteration 1 audits normally; the no-op fix makes iteration 2 re-audit with the logs
+    assert auditor.failure_logs == [None, FAILURE]
+    assert tester.calls == 2
+    assert [plan["issues"] for plan in fixer.plans] == [["first audit"], ["re-audited"]]
+    assert fixer.plans[1]["prior_failure_logs"] == FAILURE